@@ -1,63 +1,204 @@
 # Import required libraries
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+import numpy as np
 import pandas as pd
 import dash
 from dash import html, dcc
-from dash.dependencies import Input, Output
-import plotly.express as px
+from dash.dependencies import ClientsideFunction, Input, Output
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+import plotly.io as pio
+from flask_caching import Cache
+from flask_compress import Compress
 import requests
-from io import StringIO
+from io import BytesIO
+from pathlib import Path
 
 #####
 # Load Data
 #####
 URL = "https://cf-courses-data.s3.us.cloud-object-storage.appdomain.cloud/IBM-DS0321EN-SkillsNetwork/datasets/spacex_launch_dash.csv"
 
-try:
-    # Fetch the data
-    response = requests.get(URL, timeout=120)  # Timeout to prevent hanging
-    response.raise_for_status()  # Raise an error for HTTP issues
-
-    # Check content type for CSV validation
-    if 'text/csv' in response.headers.get('Content-Type', ''):
-        # Use StringIO to preprocess the raw data if needed
-        raw_data = StringIO(response.text)
-        
-        # Example: Cleaning or transforming the raw data
-        # Uncomment and modify the section below for custom preprocessing
-        # cleaned_data = ""
-        # for line in raw_data:
-        #     # Example: Strip extra whitespace and remove empty lines
-        #     line = line.strip()
-        #     if line:
-        #         cleaned_data += line + '\n'
-        # # Replace raw_data with cleaned_data for further processing
-        # raw_data = StringIO(cleaned_data)
-
-        # Load into DataFrame
-        spacex_df = pd.read_csv(raw_data)
-        print(spacex_df.head(5))
-    else:
-        raise ValueError("The URL does not point to a valid CSV file.")
-
-except requests.exceptions.RequestException as e:
-    print(f"HTTP request error: {e}")
-
-except ValueError as e:
-    print(f"Data validation error: {e}")
-
-except Exception as e:
-    print(f"Unexpected error: {e}")
-
-if spacex_df.empty:
-    raise RuntimeError("Failed to load SpaceX data. Please check the URL or connection.")
-
-# Get min and max payload for slider
-max_payload = spacex_df['Payload Mass (kg)'].max()
-min_payload = spacex_df['Payload Mass (kg)'].min()
+# Local copy of the data so restarts don't have to fetch it again, named after
+# the URL so a different source never reuses a stale copy
+CACHE_PATH = Path(__file__).parent / '.cache' / f"spacex_{hashlib.sha256(URL.encode()).hexdigest()[:16]}.parquet"
+
+# Fetch the data and build the lookup tables used by the callbacks
+def load_data():
+    spacex_df = pd.DataFrame()
+
+    try:
+        if CACHE_PATH.exists():
+            try:
+                # Load the copy saved by a previous run
+                spacex_df = pd.read_parquet(CACHE_PATH)
+                print(spacex_df.head(5))
+            except Exception as e:
+                # A damaged copy shouldn't block startup; fetch the data again instead
+                print(f"Could not read cached data, fetching it again: {e}")
+
+        if spacex_df.empty:
+            # Fetch the data
+            response = requests.get(URL, timeout=120)  # Timeout to prevent hanging
+            response.raise_for_status()  # Raise an error for HTTP issues
+
+            # Check content type for CSV validation
+            if 'text/csv' in response.headers.get('Content-Type', ''):
+                # Hand the raw bytes straight to pandas instead of decoding them to text first
+                raw_data = BytesIO(response.content)
+
+                # Example: Cleaning or transforming the raw data
+                # Uncomment and modify the section below for custom preprocessing
+                # cleaned_data = ""
+                # for line in response.text.splitlines():
+                #     # Example: Strip extra whitespace and remove empty lines
+                #     line = line.strip()
+                #     if line:
+                #         cleaned_data += line + '\n'
+                # # Replace raw_data with cleaned_data for further processing
+                # raw_data = BytesIO(cleaned_data.encode())
+
+                # Load into DataFrame, storing the repeated site and booster names as categories
+                spacex_df = pd.read_csv(
+                    raw_data,
+                    dtype={'Launch Site': 'category', 'Booster Version Category': 'category'}
+                )
+                print(spacex_df.head(5))
+
+                # Save a copy for the next run, writing it to a temporary file first so a
+                # crash or another worker writing at the same time never leaves a partial copy
+                try:
+                    CACHE_PATH.parent.mkdir(exist_ok=True)
+                    fd, tmp_path = tempfile.mkstemp(dir=CACHE_PATH.parent, suffix='.tmp')
+                    os.close(fd)
+                    try:
+                        spacex_df.to_parquet(tmp_path)
+                        os.replace(tmp_path, CACHE_PATH)
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                except Exception as e:
+                    # The data itself loaded fine; only the next start will have to fetch it again
+                    print(f"Could not save cached data: {e}")
+            else:
+                raise ValueError("The URL does not point to a valid CSV file.")
+
+    except requests.exceptions.RequestException as e:
+        print(f"HTTP request error: {e}")
+
+    except ValueError as e:
+        print(f"Data validation error: {e}")
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+
+    if spacex_df.empty:
+        raise RuntimeError("Failed to load SpaceX data. Please check the URL or connection.")
+
+    # Get min and max payload for slider
+    max_payload = spacex_df['Payload Mass (kg)'].max()
+    min_payload = spacex_df['Payload Mass (kg)'].min()
+
+    # Fingerprint of the loaded data, made part of the scatter cache key so a cache that
+    # outlives the process (e.g. Redis) never serves figures built from older data
+    data_version = hashlib.sha256(pd.util.hash_pandas_object(spacex_df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+    # Partition the data by launch site once so callbacks can look up a site
+    # instead of re-filtering the full dataframe on every interaction
+    site_partitions = dict(tuple(spacex_df.groupby('Launch Site', sort=False, observed=True)))
+    site_partitions['ALL'] = spacex_df
+
+    # Payload and class arrays for each site and booster version category, sorted by
+    # payload once so a payload range can be found by binary search and sliced
+    site_booster_points = {
+        site: {
+            booster: (booster_df['Payload Mass (kg)'].to_numpy(), booster_df['class'].to_numpy(dtype=np.int8))
+            for booster, booster_df in sub_df.sort_values('Payload Mass (kg)').groupby('Booster Version Category', observed=True)
+        }
+        for site, sub_df in site_partitions.items()
+    }
+
+    # Scatter plot with one WebGL trace per booster version category, built once so
+    # callbacks only have to swap in the points for the selected range
+    scatter_template = go.Figure(
+        data=[
+            go.Scattergl(x=[], y=[], mode='markers', name=booster, legendgroup=booster, marker={'color': color})
+            for booster, color in zip(spacex_df['Booster Version Category'].cat.categories, cycle(qualitative.Plotly))
+        ],
+        layout={
+            'xaxis': {'title': {'text': 'Payload Mass (kg)'}},
+            'yaxis': {'title': {'text': 'class'}},
+            'legend': {'title': {'text': 'Booster Version Category'}}
+        }
+    )
+
+    # Total successful launches per site for the all-sites pie chart, which never changes
+    site_successes = spacex_df.groupby('Launch Site', observed=True)['class'].sum()
+
+    # [failures, successes] per site, counted from the binary class column
+    site_outcomes = {
+        site: np.bincount(sub_df['class'].to_numpy(dtype=np.int8), minlength=2).tolist()
+        for site, sub_df in site_partitions.items()
+    }
+
+    # Chart titles for each site, formatted once
+    site_labels = {site: 'All Sites' if site == 'ALL' else site for site in site_partitions}
+    scatter_titles = {site: f"Correlation between Payload and Success for {site}" for site in site_partitions}
+    pie_titles = {site: f"Total Successful Launches for {label}" for site, label in site_labels.items()}
+    ratio_titles = {site: f"Success vs Failure Ratio for {label}" for site, label in site_labels.items()}
+
+    return {
+        'data_version': data_version,
+        'min_payload': min_payload,
+        'max_payload': max_payload,
+        'site_booster_points': site_booster_points,
+        'scatter_template': scatter_template,
+        'scatter_titles': scatter_titles,
+        # Launch outcomes per site, shipped once so the pie charts can be drawn in the browser
+        'store': {
+            'site_successes': site_successes.to_dict(),
+            'site_outcomes': site_outcomes,
+            'pie_titles': pie_titles,
+            'ratio_titles': ratio_titles
+        }
+    }
+
+# Print the error of a failed background task, which would otherwise go unnoticed
+def report_failure(future):
+    if future.exception() is not None:
+        print(f"Background task failed: {future.exception()!r}")
+
+# Load the data in the background so the server starts accepting connections
+# straight away; the charts show a placeholder until it is ready
+data_executor = ThreadPoolExecutor(max_workers=1)
+data_future = data_executor.submit(load_data)
+data_future.add_done_callback(report_failure)
+
+LOADING_FIG = go.Figure(layout={'title': {'text': 'Loading SpaceX launch data...'}})
 
 # Create a dash application
 app = dash.Dash(__name__)
 
+# Gzip the JSON figure and layout responses (and the JS/CSS bundles) on their way to the browser
+Compress(app.server)
+
+# In-memory cache for figures, keyed on the callback inputs
+# (large enough to hold every scatter plot the site dropdown and payload slider can reach).
+# SimpleCache is per process; set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share
+# the cache between the workers of a production server (see wsgi.py)
+cache = Cache(app.server, config={
+    'CACHE_TYPE': os.environ.get('CACHE_TYPE', 'SimpleCache'),
+    'CACHE_REDIS_URL': os.environ.get('CACHE_REDIS_URL', ''),
+    'CACHE_DEFAULT_TIMEOUT': 3600,
+    'CACHE_THRESHOLD': 512
+})
+
 # Create an app layout
 app.layout = html.Div(children=[
     html.H1(
@@ -78,6 +219,10 @@ app.layout = html.Div(children=[
         placeholder="Select Launch Site",
         searchable=True
     ),
+    # Filled with the launch outcomes per site once the data has loaded
+    dcc.Store(id='data-store'),
+    # Polls for the background data load until it finishes
+    dcc.Interval(id='data-poll', interval=500),
     html.Br(),
     # Pie chart for total successful launches
     html.Div(dcc.Graph(id='success-pie-chart')),
@@ -92,105 +237,125 @@ app.layout = html.Div(children=[
         min=0,
         max=10000,
         step=1000,
-        value=[min_payload, max_payload]
+        # Set to the payload range of the data once it has loaded
+        value=[0, 10000],
+        # Only update the scatter plot when the handle is released, not on every step of a drag
+        updatemode='mouseup'
     ),
     # Scatter plot for payload vs success
     html.Div(dcc.Graph(id='success-payload-scatter-chart')),
 ])
 
+# Publish the data to the browser once the background load has finished
+@app.callback(
+    [Output(component_id='data-store', component_property='data'),
+    Output(component_id='payload-slider', component_property='value'),
+    Output(component_id='data-poll', component_property='disabled')],
+    Input(component_id='data-poll', component_property='n_intervals')
+)
+def publish_data(n_intervals):
+    if not data_future.done():
+        raise PreventUpdate
+    if data_future.exception() is not None:
+        # The load failed; show its error in place of the pie charts and stop polling
+        return {'error': str(data_future.exception())}, dash.no_update, True
+
+    data = data_future.result()
+    return data['store'], [data['min_payload'], data['max_payload']], True
+
 # TASK 2:
 # Add a callback function for `site-dropdown` as input, `success-pie-chart` as output
-# Function decorator to specify function input and output
-@app.callback(
+# The pie charts are built in the browser (see assets/spacex.js) to avoid a server round-trip
+app.clientside_callback(
+    ClientsideFunction(namespace='spacex', function_name='pieChart'),
     Output(component_id='success-pie-chart', component_property='figure'),
-    Input(component_id='site-dropdown', component_property='value')
+    [Input(component_id='site-dropdown', component_property='value'),
+    Input(component_id='data-store', component_property='data')]
 )
-def get_pie_chart(entered_site):
-    # Generate pie chart for total successful launches
-    if entered_site == 'ALL':
-        fig = px.pie(spacex_df, 
-            values='class', 
-            names='Launch Site', 
-            title='Total Successful Launches for All Sites'
-        )
-        return fig
-    else:
-        # Filter data for the selected site
-        filtered_df = spacex_df[spacex_df['Launch Site'] == entered_site]
-        fig = px.pie(filtered_df, 
-            values='class', 
-            names='class', 
-            title=f"Total Successful Launches for {entered_site}")
-        return fig
 
 # TASK 3:
 # Add a callback function for success vs failure ratio pie chart
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='spacex', function_name='successRatioPieChart'),
     Output(component_id='success-ratio-pie-chart', component_property='figure'),
-    Input(component_id='site-dropdown', component_property='value')
+    [Input(component_id='site-dropdown', component_property='value'),
+    Input(component_id='data-store', component_property='data')]
 )
-def get_success_ratio_pie_chart(entered_site):
-    # Generate pie chart for success vs failure ratio
-    if entered_site == 'ALL':
-        # Aggregate total successes and failures for all sites
-        success_fail_counts = spacex_df['class'].value_counts().reset_index()
-        success_fail_counts.columns = ['Outcome', 'Count']
-        success_fail_counts['Outcome'] = success_fail_counts['Outcome'].map({1: 'Success', 0: 'Failure'})
-
-        fig = px.pie(
-            success_fail_counts, 
-            values='Count', 
-            names='Outcome', 
-            title='Success vs Failure Ratio for All Sites'
-        )
-        return fig
-    else:
-        # Filter data for the selected site
-        filtered_df = spacex_df[spacex_df['Launch Site'] == entered_site]
-        success_fail_counts = filtered_df['class'].value_counts().reset_index()
-        success_fail_counts.columns = ['Outcome', 'Count']
-        success_fail_counts['Outcome'] = success_fail_counts['Outcome'].map({1: 'Success', 0: 'Failure'})
-
-        fig = px.pie(
-            success_fail_counts, 
-            values='Count', 
-            names='Outcome', 
-            title=f"Success vs Failure Ratio for {entered_site}"
-        )
-        return fig
 
 # TASK 4:
 # Add a callback function for `site-dropdown` and `payload-slider` as inputs, `success-payload-scatter-chart` as output
 @app.callback(
     Output(component_id='success-payload-scatter-chart', component_property='figure'),
     [Input(component_id='site-dropdown', component_property='value'), 
-    Input(component_id="payload-slider", component_property="value")]
+    Input(component_id="payload-slider", component_property="value"),
+    Input(component_id='data-store', component_property='modified_timestamp')]
 )
-def get_scatter_chart(entered_site, payload_range):
-    # Initialize filtered_df with the full dataframe
-    filtered_df = spacex_df
-
-    # Filter by entered site if it's not 'ALL'
-    if entered_site != 'ALL':
-        filtered_df = filtered_df[filtered_df['Launch Site'] == entered_site]
-
-    # Further filter by payload range
-    filtered_df = filtered_df[
-        (filtered_df['Payload Mass (kg)'] >= payload_range[0]) & 
-        (filtered_df['Payload Mass (kg)'] <= payload_range[1])
-    ]
-
-    # Create the scatter plot
-    fig = px.scatter(
-        filtered_df,
-        x='Payload Mass (kg)',
-        y='class',
-        color="Booster Version Category",
-        title=f"Correlation between Payload and Success for {entered_site}"
-    )
+def get_scatter_chart(entered_site, payload_range, data_loaded_at):
+    # Until the store is published, show a placeholder; publishing re-triggers this
+    # callback. Once it is published, a worker that is still loading (another worker
+    # answered the poll) waits for its own load, since nothing would replace a placeholder
+    store_published = data_loaded_at is not None and data_loaded_at > 0
+    if not data_future.done() and not store_published:
+        return LOADING_FIG
+    # Blocks until this worker's load has finished
+    if data_future.exception() is not None:
+        # The load failed; show its error in place of the chart
+        return go.Figure(layout={'title': {'text': str(data_future.exception())}})
+    # A cleared dropdown sends None; leave the chart as it is
+    if entered_site not in data_future.result()['site_booster_points']:
+        raise PreventUpdate
+
+    # The slider value arrives as a list of ints or floats; pass a hashable tuple
+    # of floats to the cached helper so equal ranges share one cache entry
+    data_version = data_future.result()['data_version']
+    return json.loads(_scatter_chart_json(data_version, entered_site, tuple(float(v) for v in payload_range)))
+
+# Cached scatter plots don't expire: the key includes the data version, so
+# newly loaded data gets new entries instead of reusing stale ones
+@cache.memoize(timeout=0)
+def _scatter_chart_json(data_version, entered_site, payload_range):
+    # Cache the serialized figure rather than the Figure object so cache hits
+    # skip Plotly's figure validation and numpy-aware JSON encoding
+
+    # Create the scatter plot from a copy of the template, filling each booster
+    # category's trace with its points (categories without points stay out of the legend)
+    data = data_future.result()
+    fig = go.Figure(data['scatter_template'])
+    site_points = data['site_booster_points'][entered_site]
+    for trace in fig.data:
+        if trace.name not in site_points:
+            trace.update(showlegend=False)
+            continue
+
+        # Slice out the points within the payload range (inclusive) from the sorted arrays
+        payloads, outcomes = site_points[trace.name]
+        start = np.searchsorted(payloads, payload_range[0], side='left')
+        stop = np.searchsorted(payloads, payload_range[1], side='right')
+        trace.update(x=payloads[start:stop], y=outcomes[start:stop], showlegend=bool(stop > start))
+    fig.update_layout(title_text=data['scatter_titles'][entered_site])
+
+    return pio.to_json(fig)
+
+# Build every scatter plot the controls can reach (each site with any pair of the
+# slider's handle positions: its 1000 kg steps and the data's payload range, which
+# the handles start at) in the background, so callbacks only ever read from the cache
+def warm_scatter_cache():
+    # Nothing to build if the load failed (report_failure has printed why)
+    if data_future.exception() is not None:
+        return
+
+    data = data_future.result()
+    slider_steps = {float(v) for v in range(0, 10001, 1000)}
+    slider_steps |= {float(data['min_payload']), float(data['max_payload'])}
+    payload_ranges = [(lo, hi) for lo in slider_steps for hi in slider_steps if lo <= hi]
+    for site in data['site_booster_points']:
+        for payload_range in payload_ranges:
+            _scatter_chart_json(data['data_version'], site, payload_range)
 
-    return fig
+# Runs on the data executor, after the data has loaded
+warm_future = data_executor.submit(warm_scatter_cache)
+warm_future.add_done_callback(report_failure)
 
-# Run the app
+# Run the app with Flask's threaded development server; use wsgi.py for production
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    app.run(debug=False, threaded=True)
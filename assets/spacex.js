@@ -0,0 +1,66 @@
+// Clientside callbacks for the SpaceX launch dashboard.
+// The pie charts only depend on the launch outcomes per site, which are
+// precomputed on the server (along with the chart titles for each site) and
+// shipped once through the `data-store` component.
+
+// Empty figure with a message in place of the chart
+function placeholderFigure(text) {
+    return {data: [], layout: {title: {text: text}}};
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    spacex: {
+        // Pie chart for total successful launches
+        pieChart: function(entered_site, data) {
+            if (!data) {
+                return placeholderFigure('Loading SpaceX launch data...');
+            }
+            // The server failed to load the data
+            if (data.error) {
+                return placeholderFigure(data.error);
+            }
+            // A cleared dropdown sends null
+            if (data.site_outcomes[entered_site] === undefined) {
+                return placeholderFigure('Select a launch site');
+            }
+
+            var totals;
+            if (entered_site === 'ALL') {
+                // Successes per launch site are precomputed on the server
+                totals = data.site_successes;
+            } else {
+                // Sum the outcomes by class for the selected site (failures add nothing)
+                totals = {0: 0, 1: data.site_outcomes[entered_site][1]};
+            }
+
+            return {
+                data: [{type: 'pie', labels: Object.keys(totals), values: Object.values(totals)}],
+                layout: {title: {text: data.pie_titles[entered_site]}}
+            };
+        },
+
+        // Pie chart for success vs failure ratio
+        successRatioPieChart: function(entered_site, data) {
+            if (!data) {
+                return placeholderFigure('Loading SpaceX launch data...');
+            }
+            // The server failed to load the data
+            if (data.error) {
+                return placeholderFigure(data.error);
+            }
+            // A cleared dropdown sends null
+            if (data.site_outcomes[entered_site] === undefined) {
+                return placeholderFigure('Select a launch site');
+            }
+
+            // Outcomes are stored as [failures, successes]
+            var outcomes = data.site_outcomes[entered_site];
+            var counts = {Success: outcomes[1], Failure: outcomes[0]};
+
+            return {
+                data: [{type: 'pie', labels: Object.keys(counts), values: Object.values(counts)}],
+                layout: {title: {text: data.ratio_titles[entered_site]}}
+            };
+        }
+    }
+});
@@ -0,0 +1,17 @@
+# WSGI entry point for running the dashboard under a production server, e.g.
+#   gunicorn -w 4 -k gthread --threads 8 wsgi:application
+# Set CACHE_TYPE=RedisCache and CACHE_REDIS_URL so the workers share one figure cache
+import importlib.util
+import sys
+from pathlib import Path
+
+# The dashboard script's file name has spaces, so load it by path
+DASHBOARD_PATH = Path(__file__).parent / 'Dashboard with Ploty Dash.py'
+
+spec = importlib.util.spec_from_file_location('dashboard', DASHBOARD_PATH)
+dashboard = importlib.util.module_from_spec(spec)
+# Register the module before running it so Dash can find its assets folder
+sys.modules['dashboard'] = dashboard
+spec.loader.exec_module(dashboard)
+
+application = dashboard.app.server